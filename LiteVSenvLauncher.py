@@ -1,6 +1,7 @@
 # launcher.py
 from __future__ import annotations
-import os, sys, json, time, shutil, zipfile, subprocess, traceback, re
+import os, sys, io, json, atexit, mmap, itertools, time, shutil, struct, queue, zipfile, subprocess, traceback, re, threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
@@ -18,17 +19,49 @@ except ImportError:
 
 try:
     from tqdm import tqdm
+    HAS_TQDM = True
 except ImportError:
+    HAS_TQDM = False
     def tqdm(x, **kw):  # type: ignore
         return x
 
+try:
+    import orjson
+    _loads = orjson.loads
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+try:
+    # ISA-L 的 DEFLATE 实现与 zlib 接口兼容，解压明显更快；没装就用标准库
+    from isal import isal_zlib
+    zipfile.zlib = isal_zlib  # type: ignore
+except ImportError:
+    pass
+
+# ----------------------------- 路径 -----------------------------
+# 导入时算一次，避免每次 log 都重新解析 home 目录
+_VSENV = Path.home() / ".vsenv"
+_VSENV_STR = str(_VSENV)
+_LOG_PATH = _VSENV / "launcher.log"
+# vsenv 可执行文件只在启动时查一次 PATH，找不到时保持原样交给 subprocess 报错
+_VSENV_EXE = shutil.which("vsenv") or "vsenv"
+
 # ----------------------------- 工具函数 -----------------------------
+_log_fh: Optional[io.TextIOWrapper] = None
+
 def log(msg: str, level: str = "INFO"):
+    global _log_fh
     ts = time.strftime("%Y-%m-%d %H:%M:%S")
-    log_file = Path(VSCodeManager.get_vsenv_dir()) / "launcher.log"
     try:
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(f"[{ts}] {level}: {msg}\n")
+        # 日志文件只打开一次，行缓冲写入，退出时关闭
+        if _log_fh is None:
+            _log_fh = open(_LOG_PATH, "a", encoding="utf-8", buffering=1)
+            atexit.register(_log_fh.close)
+        _log_fh.write(f"[{ts}] {level}: {msg}\n")
     except Exception:
         # 如果连目录都不存在就静默忽略
         pass
@@ -37,19 +70,34 @@ def print_color(txt: str, color: Any = ""):
     """带颜色打印，无依赖时退化"""
     print(f"{color}{txt}")
 
+_FRAMES = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧"]
+
+def _spin_frames(text: str):
+    """预先拼好每一帧的字符串，循环取用，每次刷新只需一次 write"""
+    return itertools.cycle([f"\r{text} {fr}" for fr in _FRAMES])
+
 def spin(text: str, seconds: float):
     """简易转圈等待"""
     if seconds < 0.3:
         time.sleep(seconds)
         return
-    frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧"]
+    write, flush = sys.stdout.write, sys.stdout.flush
+    frames = _spin_frames(text)
     end_time = time.time() + seconds
-    idx = 0
     while time.time() < end_time:
-        print(f"\r{text} {frames[idx % len(frames)]}", end="", flush=True)
+        write(next(frames))
+        flush()
         time.sleep(0.1)
-        idx += 1
-    print("\r" + " " * (len(text) + 4) + "\r", end="")
+    write("\r" + " " * (len(text) + 4) + "\r")
+
+def _spin_until(done: threading.Event, text: str):
+    """在后台线程里转圈，直到 done 被置位；与实际工作重叠而不是额外等待"""
+    write, flush = sys.stdout.write, sys.stdout.flush
+    frames = _spin_frames(text)
+    while not done.wait(0.1):
+        write(next(frames))
+        flush()
+    write("\r" + " " * (len(text) + 4) + "\r")
 
 def safe_input(prompt: str) -> str:
     """捕获 Ctrl+C，使菜单可回退"""
@@ -59,25 +107,327 @@ def safe_input(prompt: str) -> str:
         print_color("\n操作已取消，返回主菜单。", Fore.YELLOW)
         return ""
 
+def _pick(choice: str, options: List[str]) -> Optional[str]:
+    """按序号或名称从 options 中选一项，无效时返回 None"""
+    try:
+        n = int(choice)
+    except ValueError:
+        pass
+    else:
+        if 1 <= n <= len(options):
+            return options[n - 1]
+    return choice if choice in options else None
+
+# ----------------------------- 解压 -----------------------------
+_EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+_COPY_CHUNK = 1 << 20
+_ZIP_READ_BUF = 1 << 22
+# 读取线程与解压线程之间的队列长度，满了读取线程就等待，避免内存暴涨
+_RAW_QUEUE_SIZE = 32
+# 无法 mmap 时，压缩后超过该大小的条目不整体读入内存，由工作线程流式解压
+_RAW_MAX = 1 << 26
+# 每次喂给解压器的原始数据量；按切片喂入，避免 unconsumed_tail 反复拷贝剩余数据
+_INFLATE_IN = 1 << 18
+_LOCAL_HEADER = struct.Struct(zipfile.structFileHeader)
+
+def _member_path(target: str, name: str) -> str:
+    """压缩包内路径 -> 目标路径，拒绝越出 target 的条目"""
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".")]
+    if ".." in parts or (parts and ":" in parts[0]):
+        raise ValueError(f"非法的压缩包条目：{name}")
+    return os.path.join(target, *parts)
+
+def _write_all(dst, data):
+    """无缓冲文件的 write 可能只写一部分，写到完为止"""
+    view = memoryview(data)
+    done, n = 0, len(view)
+    while done < n:
+        done += dst.write(view[done:])
+
+def _copy_stream(src, dst, buf: bytearray):
+    """用复用的缓冲区把 src 拷到无缓冲的 dst，不为每个文件重新分配"""
+    view = memoryview(buf)
+    while True:
+        n = src.readinto(view)
+        if not n:
+            break
+        _write_all(dst, view[:n])
+
+def _open_sequential(path: Path) -> io.FileIO:
+    """无缓冲打开压缩包，并提示系统这是顺序读，加大预读窗口"""
+    # Windows 下 O_SEQUENTIAL 即 FILE_FLAG_SEQUENTIAL_SCAN，其他平台该常量不存在
+    flags = os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_SEQUENTIAL", 0)
+    fh = io.FileIO(os.open(path, flags), "rb")
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass  # 只是提示，不支持的文件系统忽略即可
+    return fh
+
+def _header_skip(header: tuple, info: zipfile.ZipInfo) -> int:
+    """校验本地文件头，返回其后文件名与扩展字段的总长度"""
+    if header[0] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"本地文件头损坏：{info.filename}")
+    # header[10]/header[11] 为本地头中的文件名与扩展字段长度
+    return header[10] + header[11]
+
+def _raw_view(mm: memoryview, info: zipfile.ZipInfo) -> memoryview:
+    """直接在 mmap 上切出条目的原始数据，不经过 read() 拷贝"""
+    header = _LOCAL_HEADER.unpack_from(mm, info.header_offset)
+    start = info.header_offset + _LOCAL_HEADER.size + _header_skip(header, info)
+    end = start + info.compress_size
+    if end > len(mm):
+        raise zipfile.BadZipFile(f"数据不完整：{info.filename}")
+    return mm[start:end]
+
+def _read_raw(fp, info: zipfile.ZipInfo) -> bytes:
+    """跳过本地文件头，读出条目未解压的原始数据"""
+    fp.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(fp.read(_LOCAL_HEADER.size))
+    fp.seek(_header_skip(header, info), os.SEEK_CUR)
+    raw = fp.read(info.compress_size)
+    if len(raw) != info.compress_size:
+        raise zipfile.BadZipFile(f"数据不完整：{info.filename}")
+    return raw
+
+def _inflate_to(raw, info: zipfile.ZipInfo, dest: str):
+    """把原始数据解压写入 dest 并校验 CRC；zlib 在解压时会释放 GIL"""
+    zlib = zipfile.zlib  # 可能已被替换为 isal_zlib
+    crc = 0
+    with open(dest, "wb", buffering=0) as dst:
+        if info.compress_type == zipfile.ZIP_STORED:
+            crc = zlib.crc32(raw)
+            _write_all(dst, raw)
+        else:
+            d = zlib.decompressobj(-15)
+            view = memoryview(raw)
+            for off in range(0, len(view), _INFLATE_IN):
+                chunk = d.decompress(view[off:off + _INFLATE_IN])
+                if chunk:
+                    crc = zlib.crc32(chunk, crc)
+                    _write_all(dst, chunk)
+            chunk = d.flush()
+            if chunk:
+                crc = zlib.crc32(chunk, crc)
+                _write_all(dst, chunk)
+    if crc != info.CRC:
+        raise zipfile.BadZipFile(f"CRC 校验失败：{info.filename}")
+
+def _plan_members(target: str, infos: List[zipfile.ZipInfo]):
+    """一次遍历算出要写的文件、要建的目录，以及共同的顶层目录名"""
+    files = []
+    dirs = {target}
+    root = infos[0].filename.split("/", 1)[0] if infos else None
+    prefix = f"{root}/"
+    has_nesting = root is not None
+    for info in infos:
+        # 顺带判断是否整体包在一个顶层目录里，不再单独遍历一遍
+        if has_nesting and not info.filename.startswith(prefix):
+            has_nesting = False
+        dest = _member_path(target, info.filename)
+        if info.is_dir():
+            dirs.add(dest)
+        else:
+            dirs.add(os.path.dirname(dest))
+            files.append((info, dest))
+    return files, dirs, root if has_nesting else None
+
+def _extract_zip(zip_path: Path, target: Path) -> Optional[str]:
+    """并行解压：当前线程顺序读取原始压缩数据，线程池负责解压写盘。
+    返回所有条目共同的顶层目录名，没有则返回 None"""
+    # 逐条目的路径都用 str 拼接，省掉每个文件一次 Path 对象构造
+    target_str = os.fspath(target)
+    with _open_sequential(zip_path) as fh:
+        fp = io.BufferedReader(fh, buffer_size=_ZIP_READ_BUF)
+        with zipfile.ZipFile(fp) as zf:
+            files, dirs, root = _plan_members(target_str, zf.infolist())
+        # 能 mmap 就直接在映射上切片取数据，工作线程各读各的区间，无需加锁
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, OverflowError):
+            mm = None
+        if mm is not None and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        mview = memoryview(mm) if mm is not None else None
+        # 每个目录只建一次，按深度排序保证父目录先于子目录
+        for d in sorted(dirs, key=lambda p: p.count(os.sep)):
+            os.makedirs(d, exist_ok=True)
+
+        # 加密、非 deflate 或过大的条目交给工作线程用各自的 ZipFile 流式解压
+        # （ZipFile 不是线程安全的，每个工作线程各自打开一份）
+        local = threading.local()
+        opened: List[zipfile.ZipFile] = []
+        lock = threading.Lock()
+
+        def _zf() -> zipfile.ZipFile:
+            zf = getattr(local, "zf", None)
+            if zf is None:
+                zf = local.zf = zipfile.ZipFile(zip_path)
+                with lock:
+                    opened.append(zf)
+            return zf
+
+        def _buf() -> bytearray:
+            buf = getattr(local, "buf", None)
+            if buf is None:
+                buf = local.buf = bytearray(_COPY_CHUNK)
+            return buf
+
+        # 目标文件一律普通 open(..., "wb")，不加 O_SYNC、不逐文件 fsync：
+        # 环境解压失败重来即可，交给系统回写比每个文件落盘快得多
+        q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=_RAW_QUEUE_SIZE)
+        errors: List[BaseException] = []
+        failed = threading.Event()
+        bar = tqdm(total=len(files), desc="解压") if HAS_TQDM else None
+
+        def _worker():
+            while True:
+                item = q.get()
+                if item is None:
+                    return
+                if failed.is_set():
+                    continue  # 已经出错，只把队列取空
+                info, dest, raw = item
+                try:
+                    if raw is None:
+                        with _zf().open(info) as src, open(dest, "wb", buffering=0) as dst:
+                            _copy_stream(src, dst, _buf())
+                    else:
+                        _inflate_to(raw, info, dest)
+                except BaseException as e:
+                    errors.append(e)
+                    failed.set()
+                if bar is not None:
+                    bar.update(1)
+
+        # 没有 tqdm 时没有进度条，改用后台转圈提示
+        done = threading.Event()
+        spinner = None
+        if not HAS_TQDM:
+            spinner = threading.Thread(target=_spin_until, args=(done, "解压中"), daemon=True)
+            spinner.start()
+        try:
+            with ThreadPoolExecutor(max_workers=_EXTRACT_WORKERS) as pool:
+                for _ in range(_EXTRACT_WORKERS):
+                    pool.submit(_worker)
+                try:
+                    for info, dest in files:
+                        if failed.is_set():
+                            break
+                        if (
+                            info.flag_bits & 0x1
+                            or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+                            or (mview is None and info.compress_size > _RAW_MAX)
+                        ):
+                            raw = None
+                        elif mview is not None:
+                            raw = _raw_view(mview, info)
+                        else:
+                            raw = _read_raw(fp, info)
+                        q.put((info, dest, raw))
+                        raw = None
+                finally:
+                    for _ in range(_EXTRACT_WORKERS):
+                        q.put(None)
+            if errors:
+                for e in errors:
+                    # 清掉工作线程栈帧里对 mmap 切片的引用，mmap 才能关闭
+                    traceback.clear_frames(e.__traceback__)
+                raise errors[0]
+        finally:
+            done.set()
+            if spinner is not None:
+                spinner.join()
+            if bar is not None:
+                bar.close()
+            for zf in opened:
+                zf.close()
+            if mm is not None:
+                mview.release()
+                try:
+                    mm.close()
+                except BufferError:
+                    pass  # 仍有切片未释放（例如异常回溯里），交给 GC 解除映射
+    return root
+
+# ----------------------------- 删除 -----------------------------
+def _fast_rmtree(root: Path):
+    """基于目录 fd 的删除：unlink/rmdir 都相对父目录 fd，用显式栈代替递归"""
+    if not (
+        os.unlink in os.supports_dir_fd
+        and os.rmdir in os.supports_dir_fd
+        and os.open in os.supports_dir_fd
+        and os.scandir in os.supports_fd
+    ):
+        # Windows 等平台不支持 dir_fd，退回标准实现
+        shutil.rmtree(root)
+        return
+    flags = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0)
+    # 栈帧：[目录 fd, 目录名, 待处理的子目录名(None 表示尚未扫描)]
+    stack: List[list] = [[os.open(root, flags), None, None]]
+    try:
+        while stack:
+            frame = stack[-1]
+            dfd, pending = frame[0], frame[2]
+            if pending is None:
+                pending = frame[2] = []
+                with os.scandir(dfd) as it:
+                    for e in it:
+                        if e.is_dir(follow_symlinks=False):
+                            pending.append(e.name)
+                        else:
+                            os.unlink(e.name, dir_fd=dfd)
+            if pending:
+                name = pending.pop()
+                stack.append([os.open(name, flags, dir_fd=dfd), name, None])
+                continue
+            stack.pop()
+            os.close(dfd)
+            if stack:
+                os.rmdir(frame[1], dir_fd=stack[-1][0])
+    finally:
+        for frame in stack:
+            os.close(frame[0])
+    os.rmdir(root)
+
 # ----------------------------- 核心类 -----------------------------
+_WS_RE = re.compile(r"\s")
+# list_envs 缓存：(.vsenv 的 mtime_ns, 环境列表)，创建/删除后置空
+_envs_cache: tuple = (None, [])
+
 class VSCodeManager:
-    VSEnv = Path.home() / ".vsenv"
+    VSEnv = _VSENV
 
     @staticmethod
     def get_vsenv_dir() -> str:
-        return str(VSCodeManager.VSEnv)
+        return _VSENV_STR
 
     @staticmethod
     def list_envs() -> List[str]:
-        if not VSCodeManager.VSEnv.exists():
+        global _envs_cache
+        try:
+            mtime = os.stat(VSCodeManager.VSEnv).st_mtime_ns
+        except FileNotFoundError:
             return []
-        return sorted(
-            {
-                d.relative_to(VSCodeManager.VSEnv).parts[0]
-                for d in VSCodeManager.VSEnv.rglob("vscode")
-                if d.is_dir()
-            }
-        )
+        if _envs_cache[0] == mtime:
+            return list(_envs_cache[1])
+        # 环境只在第一层，不必递归整个 .vsenv；每个环境只 stat 一次 vscode 子目录，
+        # 再对每个环境 scandir 反而要多出 open/getdents/close 三次系统调用
+        with os.scandir(VSCodeManager.VSEnv) as it:
+            envs = sorted(
+                e.name
+                for e in it
+                if e.is_dir() and os.path.isdir(os.path.join(e.path, "vscode"))
+            )
+        _envs_cache = (mtime, envs)
+        return list(envs)
+
+    @staticmethod
+    def _invalidate_envs():
+        global _envs_cache
+        _envs_cache = (None, [])
 
     # ------------------- 创建环境 -------------------
     @staticmethod
@@ -91,8 +441,9 @@ class VSCodeManager:
             for i, p in enumerate(zips, 1):
                 print(f"{i}. {p.name}")
             choice = safe_input("请选择序号或直接输入路径 (Enter 跳过): ")
-            if choice.isdigit() and 1 <= int(choice) <= len(zips):
-                zip_path = zips[int(choice) - 1]
+            picked = _pick(choice, [str(p) for p in zips])
+            if picked:
+                zip_path = Path(picked)
             elif choice and Path(choice).exists():
                 zip_path = Path(choice)
         if zip_path is None:
@@ -102,7 +453,7 @@ class VSCodeManager:
             safe_input("按回车返回...")
             return
         env_name = ""
-        while not env_name or re.search(r"\s", env_name):
+        while not env_name or _WS_RE.search(env_name):
             env_name = safe_input("环境名称(英文无空格): ")
             if not env_name:
                 print_color("名称不能为空", Fore.RED)
@@ -114,21 +465,19 @@ class VSCodeManager:
 
         try:
             print_color("正在解压，请稍候...", Fore.GREEN)
-            with zipfile.ZipFile(zip_path) as zf:
-                members = zf.namelist()
-                root = members[0].split("/")[0]
-                has_nesting = all(m.startswith(root + "/") for m in members)
-                for m in tqdm(members, desc="解压"):
-                    zf.extract(m, path=target)
-                vscode_src = target / root if has_nesting else target
-                vscode_dst = target / "vscode"
-                if vscode_src != vscode_dst:
-                    vscode_src.rename(vscode_dst)
+            root = _extract_zip(zip_path, target)
+            target_str = os.fspath(target)
+            vscode_src = os.path.join(target_str, root) if root else target_str
+            vscode_dst = os.path.join(target_str, "vscode")
+            if vscode_src != vscode_dst:
+                os.rename(vscode_src, vscode_dst)
             print_color("✅ 环境创建完成！", Fore.GREEN)
             log(f"Created env {env_name}")
         except Exception as e:
             print_color(f"创建失败：{e}", Fore.RED)
             log(traceback.format_exc(), "ERROR")
+        # 失败时也可能留下半成品目录，一并让缓存失效
+        VSCodeManager._invalidate_envs()
         safe_input("按回车返回...")
 
     # ------------------- 启动环境 -------------------
@@ -143,11 +492,8 @@ class VSCodeManager:
         for i, e in enumerate(envs, 1):
             print(f"{i}. {e}")
         choice = safe_input("输入序号或名称: ").strip()
-        if choice.isdigit() and 1 <= int(choice) <= len(envs):
-            env = envs[int(choice) - 1]
-        elif choice in envs:
-            env = choice
-        else:
+        env = _pick(choice, envs)
+        if env is None:
             print_color("无效选择", Fore.RED)
             safe_input("按回车返回...")
             return
@@ -156,7 +502,7 @@ class VSCodeManager:
         cfg_file = VSCodeManager.VSEnv / "last_options.json"
         last: Dict[str, Any] = {}
         if cfg_file.exists():
-            last = json.loads(cfg_file.read_text(encoding="utf-8"))
+            last = _loads(cfg_file.read_bytes())
         print_color("\n=== 启动选项 (留空=使用上次/默认) ===", Fore.CYAN)
         opts: Dict[str, Any] = {}
         for k, text, default in [
@@ -178,8 +524,8 @@ class VSCodeManager:
             else:
                 opts[k] = val == "y" or (isinstance(default, bool) and val == "")
         # 保存本次配置
-        cfg_file.write_text(json.dumps(opts, ensure_ascii=False, indent=2))
-        cmd = ["vsenv", "start", env]
+        cfg_file.write_bytes(_dumps(opts))
+        cmd = ["start", env]
         for k, v in opts.items():
             if v is True:
                 cmd.append(k)
@@ -187,8 +533,7 @@ class VSCodeManager:
                 cmd.extend([k, v])
         try:
             print_color("正在启动...", Fore.GREEN)
-            spin("启动中", 1)
-            subprocess.run(cmd, check=True)
+            VSCodeManager._run_vsenv(*cmd)
             log(f"Started {env} with {opts}")
         except subprocess.CalledProcessError:
             print_color("启动失败，请检查 vsenv 是否正确安装", Fore.RED)
@@ -207,32 +552,36 @@ class VSCodeManager:
         for i, e in enumerate(envs, 1):
             print(f"{i}. {e}")
         choice = safe_input("输入序号或名称: ").strip()
-        if choice.isdigit() and 1 <= int(choice) <= len(envs):
-            env = envs[int(choice) - 1]
-        elif choice in envs:
-            env = choice
-        else:
+        env = _pick(choice, envs)
+        if env is None:
             print_color("无效选择", Fore.RED)
             safe_input("按回车返回...")
             return
         if safe_input(f"确认删除 {env} 吗？(y/N): ").lower() == "y":
             try:
                 target = VSCodeManager.VSEnv / env
-                shutil.rmtree(target)
+                _fast_rmtree(target)
                 print_color("✅ 已删除", Fore.GREEN)
                 log(f"Removed env {env}")
             except Exception as e:
                 print_color(f"删除失败：{e}", Fore.RED)
                 log(traceback.format_exc(), "ERROR")
+            VSCodeManager._invalidate_envs()
         else:
             print_color("已取消", Fore.YELLOW)
         safe_input("按回车返回...")
 
     # ------------------- 注册 / 注销 / 重置 -------------------
+    @staticmethod
+    def _run_vsenv(*args: str):
+        # POSIX 下 close_fds=False 可让 subprocess 走 posix_spawn/vfork，不复制页表；
+        # 本进程打开的 fd 默认不可继承（PEP 446），不会漏给 vsenv
+        subprocess.run([_VSENV_EXE, *args], check=True, close_fds=os.name == "nt")
+
     @staticmethod
     def _simple_cmd(action: str, msg: str):
         try:
-            subprocess.run(["vsenv", action], check=True)
+            VSCodeManager._run_vsenv(action)
             print_color(msg, Fore.GREEN)
             log(f"{action} executed")
         except: